@@ -0,0 +1,198 @@
+'''
+Benchmark das etapas do dashboard com dados sinteticos (não acessa a api).
+
+    python -m benchmarks.executa --linhas 10000 100000 1000000
+    python -m benchmarks.executa --linhas 10000000 --etapas agregacao filtro --sem-anterior
+
+Cada etapa é medida separadamente (ingestão, filtro, agregação, graficos e exportação). Quando existe,
+o caminho anterior da etapa também é medido, para comparar. Os tempos são acrescentados em
+benchmarks/resultados.jsonl e comparados com a execução anterior registrada para as mesmas linhas:
+etapas mais lentas que a tolerancia são apontadas como regressão. O arquivo é local de cada maquina
+(ignorado pelo git): tempos de maquinas diferentes não são comparaveis.
+'''
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.gerador import gera_dados, gera_payload
+from benchmarks.ingestao import cronometra, ingestao_anterior
+from utils import graficos
+from utils.agregacao import PARALELO_PROCESSOS, agrega_vendas, constroi_cubo
+from utils.exportacao import converte
+from utils.filtros import MotorFiltros
+from utils.ingestao import le_json
+
+RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados.jsonl')
+
+# filtros do Dados Brutos equivalentes à pagina aberta com alguns produtos e uma faixa de preço escolhidos
+QUERY = '''
+Produto in @produtos and \
+`Categoria do Produto` in @categoria and \
+@preco[0] <= Preço <= @preco[1] and \
+@frete[0] <= Frete <= @frete[1] and \
+@data_compra[0] <= `Data da Compra` <= @data_compra[1] and \
+Vendedor in @vendedor and \
+`Local da compra` in @local and \
+@avaliacao[0] <= `Avaliação da compra` <= @avaliacao[1] and \
+`Tipo de pagamento` in @pagamento and \
+@parcelas[0] <= `Quantidade de parcelas` <= @parcelas[1] and \
+@latitude[0] <= lat <= @latitude[1] and \
+@longitude[0] <= lon <= @longitude[1]
+'''
+
+def filtros_tipicos(dados):
+    intervalo = lambda coluna: (dados[coluna].min().item(), dados[coluna].max().item())
+    todos = lambda coluna: list(dados[coluna].unique())
+    return {'Produto' : todos('Produto')[::2], 
+            'Categoria do Produto' : todos('Categoria do Produto'), 
+            'Preço' : (100, 2000), 
+            'Frete' : intervalo('Frete'), 
+            'Data da Compra' : (dados['Data da Compra'].min(), dados['Data da Compra'].max()), 
+            'Vendedor' : todos('Vendedor'), 
+            'Local da compra' : todos('Local da compra'), 
+            'Avaliação da compra' : intervalo('Avaliação da compra'), 
+            'Tipo de pagamento' : todos('Tipo de pagamento'), 
+            'Quantidade de parcelas' : intervalo('Quantidade de parcelas'), 
+            'lat' : intervalo('lat'), 
+            'lon' : intervalo('lon')}
+
+def filtro_anterior(dados, filtros):
+    variaveis = {'produtos' : filtros['Produto'], 'categoria' : filtros['Categoria do Produto'], 'preco' : filtros['Preço'], 
+                 'frete' : filtros['Frete'], 'data_compra' : filtros['Data da Compra'], 'vendedor' : filtros['Vendedor'], 
+                 'local' : filtros['Local da compra'], 'avaliacao' : filtros['Avaliação da compra'], 
+                 'pagamento' : filtros['Tipo de pagamento'], 'parcelas' : filtros['Quantidade de parcelas'], 
+                 'latitude' : filtros['lat'], 'longitude' : filtros['lon']}
+    return dados.query(QUERY, local_dict = variaveis)
+
+def filtro_motor(motor, filtros):
+    # estado novo a cada chamada: mede a avaliação completa dos filtros, sem o cache da sessão
+    return motor.dados.iloc[motor.filtra(filtros, {})]
+
+def agregacao_anterior(dados):
+    # tabelas do Dashboard.py antes da camada de agregação (receita + copia com Vendas = 1)
+    estados = dados.groupby(['Local da compra'], observed = True)[['Preço']].sum()
+    estados = dados.drop_duplicates(subset = 'Local da compra')[['Local da compra', 'lat', 'lon']].merge(estados, left_on = 'Local da compra', right_index = True)
+    mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq = 'ME'))[['Preço']].sum()
+    categorias = dados.groupby(['Categoria do Produto'], observed = True)[['Preço']].sum()
+    vendas = dados.copy()
+    vendas['Vendas'] = 1
+    estados_vendas = vendas.groupby(['Local da compra'], observed = True)[['Vendas']].sum()
+    estados_vendas = vendas.drop_duplicates(subset = 'Local da compra')[['Local da compra', 'lat', 'lon']].merge(estados_vendas, left_on = 'Local da compra', right_index = True)
+    mensal_vendas = vendas.set_index('Data da Compra').groupby(pd.Grouper(freq = 'ME'))[['Vendas']].sum()
+    categorias_vendas = vendas.groupby(['Categoria do Produto'], observed = True)[['Vendas']].sum()
+    vendedores = dados.groupby('Vendedor', observed = True)['Preço'].agg(['sum', 'count'])
+    return estados, mensal, categorias, estados_vendas, mensal_vendas, categorias_vendas, vendedores
+
+def monta_graficos(agregados):
+    for funcao in (graficos.mapa_estados, graficos.barras_estados, graficos.linha_mensal, graficos.barras_horizontais):
+        funcao.clear()                                                                             # mede a construção, não o cache
+    estados, mensal, categorias = agregados['estados'], agregados['mensal'], agregados['categorias']
+    vendedores = agregados['vendedores']
+    figuras = []
+    for valor in ('Preço', 'Vendas'):
+        ordenados = estados.sort_values(valor, ascending = False)
+        figuras.append(graficos.mapa_estados(ordenados, valor, 'Estados'))
+        figuras.append(graficos.barras_estados(ordenados, valor, 'Top 5 Estados', valor))
+        figuras.append(graficos.linha_mensal(mensal, valor, 'Mensal', valor))
+        figuras.append(graficos.barras_horizontais(categorias[[valor]].sort_values(valor), valor, 'Categorias', valor))
+        figuras.append(graficos.barras_horizontais(vendedores[[valor]].sort_values(valor).head(5), valor, 'Vendedores'))
+    return [figura.to_json() for figura in figuras]                                               # inclui a serialização enviada ao navegador
+
+def executa(linhas, etapas, repeticoes, anterior, max_linhas_json):
+    dados = gera_dados(linhas)
+    resultados = {}
+
+    def mede(etapa, funcao):
+        resultados[etapa], valor = cronometra(funcao, repeticoes)
+        print(f'  {etapa:<28} {resultados[etapa]:>9.4f}s')
+        return valor
+
+    if 'ingestao' in etapas and linhas <= max_linhas_json:
+        conteudo = gera_payload(gera_dados(linhas, tipos_compactos = False))                       # mesmas vendas, floats em float64 como na api
+        if anterior:
+            mede('ingestao.anterior', lambda: ingestao_anterior(conteudo))
+        mede('ingestao', lambda: le_json(conteudo))
+        del conteudo
+
+    if 'filtro' in etapas or 'exportacao' in etapas:
+        filtros = filtros_tipicos(dados)
+        motor = mede('filtro.indices', lambda: MotorFiltros(dados))
+        filtrados = mede('filtro', lambda: filtro_motor(motor, filtros))
+        posicoes = motor.filtra(filtros, {})
+        if anterior:
+            mede('filtro.anterior', lambda: filtro_anterior(dados, filtros))
+
+    if 'agregacao' in etapas or 'graficos' in etapas:
+        if anterior:
+            mede('agregacao.anterior', lambda: agregacao_anterior(dados))
+        cubo = mede('agregacao.cubo', lambda: constroi_cubo(dados, processos = 1))
+        if PARALELO_PROCESSOS > 1:                                                                 # a primeira repetição inclui a criação do pool
+            mede('agregacao.cubo_paralelo', lambda: constroi_cubo(dados, processos = PARALELO_PROCESSOS))
+        agregados = mede('agregacao', lambda: agrega_vendas(cubo))
+        vendedores = list(cubo['Vendedor'].unique()[:3])
+        mede('agregacao.filtro_vendedor', lambda: agrega_vendas(cubo[cubo['Vendedor'].isin(vendedores)]))
+
+    if 'graficos' in etapas:
+        mede('graficos', lambda: monta_graficos(agregados))
+
+    if 'exportacao' in etapas:
+        if anterior:
+            mede('exportacao.anterior', lambda: filtrados.to_csv(index = False).encode('utf-8'))
+        for formato in ('csv', 'csv (gzip)', 'parquet'):
+            mede(f'exportacao.{formato}', lambda: converte(motor.dados, formato, linhas = posicoes))
+
+    return resultados
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, 
+                              text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ultima_execucao(caminho):
+    # (linhas, etapa) -> segundos da execução mais recente registrada
+    referencia = {}
+    if os.path.exists(caminho):
+        with open(caminho, encoding = 'utf-8') as arquivo:
+            for linha in arquivo:
+                registro = json.loads(linha)
+                referencia[(registro['linhas'], registro['etapa'])] = registro['segundos']
+    return referencia
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type = int, nargs = '+', default = [10_000, 100_000, 1_000_000])
+    parser.add_argument('--etapas', nargs = '+', default = ['ingestao', 'filtro', 'agregacao', 'graficos', 'exportacao'])
+    parser.add_argument('--repeticoes', type = int, default = 3)
+    parser.add_argument('--sem-anterior', action = 'store_true', help = 'não mede os caminhos anteriores')
+    parser.add_argument('--max-linhas-json', type = int, default = 1_000_000, help = 'acima disso a ingestão não é medida (json grande demais)')
+    parser.add_argument('--resultados', default = RESULTADOS)
+    parser.add_argument('--tolerancia', type = float, default = 0.2, help = 'aumento relativo aceito antes de apontar regressão')
+    argumentos = parser.parse_args()
+
+    logging.getLogger('streamlit.runtime.caching.cache_data_api').setLevel(logging.ERROR)          # cache do streamlit fora do app avisa a cada chamada
+    referencia = ultima_execucao(argumentos.resultados)
+    registro = {'data' : datetime.now().isoformat(timespec = 'seconds'), 'commit' : commit_atual()}
+
+    regressoes = []
+    with open(argumentos.resultados, 'a', encoding = 'utf-8') as arquivo:
+        for linhas in argumentos.linhas:
+            print(f'{linhas} linhas')
+            for etapa, segundos in executa(linhas, argumentos.etapas, argumentos.repeticoes, 
+                                           not argumentos.sem_anterior, argumentos.max_linhas_json).items():
+                arquivo.write(json.dumps({**registro, 'linhas' : linhas, 'etapa' : etapa, 'segundos' : segundos}) + '\n')
+                antes = referencia.get((linhas, etapa))
+                if antes is not None and segundos > antes * (1 + argumentos.tolerancia):
+                    regressoes.append(f'{etapa} ({linhas} linhas): {antes:.4f}s -> {segundos:.4f}s')
+
+    if regressoes:
+        print('\nregressões em relação à execução anterior:')
+        print('\n'.join(f'  {regressao}' for regressao in regressoes))
+        sys.exit(1)
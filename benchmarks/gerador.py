@@ -0,0 +1,117 @@
+'''
+Gerador de dados sinteticos com o mesmo esquema do payload da api (https://labdados.com/produtos).
+
+    python -m benchmarks.gerador --linhas 1000000 --saida dados_sinteticos.arrow
+'''
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.esquema import normaliza_tipos
+
+# categoria -> produtos (cardinalidades proximas das do dataset real: ~50 produtos em 8 categorias)
+PRODUTOS = {'eletronicos' : ['Celular ABXY', 'Fone de ouvido', 'Headset', 'Smart TV', 'TV Led UHD 4K', 'Tablet ABXY', 'Iphone 15'], 
+            'eletrodomesticos' : ['Geladeira', 'Lava louças', 'Lavadora de roupas', 'Micro-ondas', 'Secadora de roupas', 'Ferro de passar'], 
+            'moveis' : ['Cama box', 'Cama king', 'Cadeira de escritório', 'Guarda roupas', 'Mesa de jantar', 'Mesa de centro', 'Sofá retrátil', 'Cômoda'], 
+            'brinquedos' : ['Blocos de montar', 'Boneca bebê', 'Carrinho controle remoto', 'Dinossauro Rex', 'Jogo de tabuleiro', 'Quebra cabeça'], 
+            'instrumentos musicais' : ['Bateria', 'Guitarra', 'Violão', 'Teclado', 'Pandeiro'], 
+            'esporte e lazer' : ['Bicicleta', 'Bola de basquete', 'Bola de futebol', 'Corda de pular', 'Kit halteres', 'Mochila', 'Barraca'], 
+            'livros' : ['Ciência de dados com python', 'Dashboards com Power BI', 'Iniciando em programação', 'Modelagem preditiva', 'Pandas 101'], 
+            'utilidades domesticas' : ['Copo de vidro', 'Jogo de copos', 'Jogo de panelas', 'Panela de pressão', 'Talheres', 'Faqueiro']}
+
+# preço medio de cada categoria (os produtos variam em torno dele)
+PRECO_MEDIO = {'eletronicos' : 1800, 'eletrodomesticos' : 1500, 'moveis' : 900, 'brinquedos' : 120, 
+               'instrumentos musicais' : 700, 'esporte e lazer' : 250, 'livros' : 60, 'utilidades domesticas' : 150}
+
+VENDEDORES = ['Ana Lopes', 'Beatriz Moraes', 'Bruno Dias', 'Camila Ferreira', 'Felipe Santos', 'Isabella Pereira', 'Juliana Costa', 
+              'Larissa Alves', 'Lucas Oliveira', 'Mariana Ferreira', 'Nadia Oliveira', 'Pedro Gomes', 'Rafael Costa', 'Thiago Silva']
+
+# estado -> (lat, lon, peso nas vendas)
+ESTADOS = {'AC' : (-8.77, -70.55, 1), 'AL' : (-9.71, -35.73, 3), 'AP' : (1.41, -51.77, 1), 'AM' : (-3.07, -61.66, 3), 
+           'BA' : (-12.96, -38.51, 12), 'CE' : (-3.71, -38.54, 7), 'DF' : (-15.83, -47.86, 4), 'ES' : (-19.19, -40.34, 4), 
+           'GO' : (-16.64, -49.31, 6), 'MA' : (-2.55, -44.30, 5), 'MT' : (-12.64, -55.42, 3), 'MS' : (-20.51, -54.54, 3), 
+           'MG' : (-18.10, -44.38, 20), 'PA' : (-5.53, -52.29, 6), 'PB' : (-7.06, -35.55, 3), 'PR' : (-24.89, -51.55, 10), 
+           'PE' : (-8.28, -35.07, 7), 'PI' : (-8.28, -43.68, 3), 'RJ' : (-22.84, -43.15, 16), 'RN' : (-5.22, -36.52, 3), 
+           'RO' : (-11.22, -62.80, 2), 'RS' : (-30.01, -51.22, 11), 'RR' : (1.89, -61.22, 1), 'SC' : (-27.33, -49.44, 7), 
+           'SP' : (-23.55, -46.64, 40), 'SE' : (-10.90, -37.07, 2), 'TO' : (-10.25, -48.25, 2)}
+
+PAGAMENTOS = {'cartao_credito' : 0.73, 'boleto' : 0.19, 'cupom' : 0.06, 'cartao_debito' : 0.02}
+
+AVALIACOES = {1 : 0.11, 2 : 0.03, 3 : 0.08, 4 : 0.19, 5 : 0.59}
+
+def _categorica(codigos, nomes):
+    # categorias em ordem alfabetica, como as geradas pelo normaliza_tipos a partir da api
+    nomes = np.asarray(nomes, dtype = object)
+    ordem = np.argsort(nomes, kind = 'stable')
+    posicao = np.empty(len(nomes), dtype = np.intp)
+    posicao[ordem] = np.arange(len(nomes))
+    return pd.Categorical.from_codes(posicao[codigos], nomes[ordem])
+
+def gera_dados(linhas, semente = 0, inicio = '2020-01-01', fim = '2023-12-31', tipos_compactos = True):
+    '''
+    DataFrame com linhas vendas sinteticas, ja com as datas convertidas.
+
+    tipos_compactos: aplica os tipos do esquema (como depois da ingestão) | False mantem os floats em float64,
+    que é o que gera_payload precisa para escrever os mesmos numeros que a api
+    '''
+    aleatorio = np.random.default_rng(semente)
+
+    produtos = [(produto, categoria) for categoria, nomes in PRODUTOS.items() for produto in nomes]
+    base_produto = np.array([PRECO_MEDIO[categoria] * aleatorio.uniform(0.5, 1.5) for _, categoria in produtos])
+    produto = aleatorio.integers(len(produtos), size = linhas)
+    preco = np.round(base_produto[produto] * aleatorio.uniform(0.8, 1.2, size = linhas), 2)
+    frete = preco * aleatorio.uniform(0.01, 0.08, size = linhas)
+
+    dias = (pd.Timestamp(fim) - pd.Timestamp(inicio)).days + 1
+    data = pd.Timestamp(inicio) + pd.to_timedelta(aleatorio.integers(dias, size = linhas), unit = 'D')
+
+    siglas = list(ESTADOS)
+    pesos = np.array([peso for _, _, peso in ESTADOS.values()], dtype = float)
+    estado = aleatorio.choice(len(siglas), size = linhas, p = pesos / pesos.sum())
+    latitudes = np.array([lat for lat, _, _ in ESTADOS.values()])
+    longitudes = np.array([lon for _, lon, _ in ESTADOS.values()])
+
+    pagamento = aleatorio.choice(len(PAGAMENTOS), size = linhas, p = list(PAGAMENTOS.values()))
+    parcelas = np.where(pagamento == 0, aleatorio.integers(1, 25, size = linhas), 1)                   # só o cartão de credito é parcelado
+    categorias = list(PRODUTOS)
+
+    categoria_produto = np.array([categorias.index(categoria) for _, categoria in produtos])
+
+    dados = pd.DataFrame({'Produto' : _categorica(produto, [nome for nome, _ in produtos]), 
+                          'Categoria do Produto' : _categorica(categoria_produto[produto], categorias), 
+                          'Preço' : preco, 
+                          'Frete' : frete, 
+                          'Data da Compra' : data, 
+                          'Vendedor' : _categorica(aleatorio.integers(len(VENDEDORES), size = linhas), VENDEDORES), 
+                          'Local da compra' : _categorica(estado, siglas), 
+                          'Avaliação da compra' : aleatorio.choice(list(AVALIACOES), size = linhas, p = list(AVALIACOES.values())), 
+                          'Tipo de pagamento' : _categorica(pagamento, list(PAGAMENTOS)), 
+                          'Quantidade de parcelas' : parcelas, 
+                          'lat' : latitudes[estado], 
+                          'lon' : longitudes[estado]})
+    return normaliza_tipos(dados) if tipos_compactos else dados
+
+def gera_payload(dados):
+    '''Json no formato da api (lista de registros, data como dd/mm/aaaa) | dados de gera_dados(..., tipos_compactos = False).'''
+    payload = dados.astype({coluna : 'object' for coluna in dados.select_dtypes('category').columns})
+    payload['Data da Compra'] = payload['Data da Compra'].dt.strftime('%d/%m/%Y')
+    # 10 casas: os valores com 2 casas (preço, lat, lon) saem como na api (547.09, e não 547.090000000000032)
+    return payload.to_json(orient = 'records', force_ascii = False, double_precision = 10).encode('utf-8')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type = int, default = 100_000)
+    parser.add_argument('--semente', type = int, default = 0)
+    parser.add_argument('--saida', required = True, help = 'arquivo .arrow (snapshot) ou .json (payload da api)')
+    argumentos = parser.parse_args()
+
+    saida_json = argumentos.saida.endswith('.json')
+    dados = gera_dados(argumentos.linhas, argumentos.semente, tipos_compactos = not saida_json)
+    if saida_json:
+        with open(argumentos.saida, 'wb') as arquivo:
+            arquivo.write(gera_payload(dados))
+    else:
+        from utils.snapshot import grava_snapshot
+        grava_snapshot(dados, argumentos.saida)
+    print(f'{len(dados)} linhas gravadas em {argumentos.saida}')
@@ -0,0 +1,43 @@
+'''
+Compara a ingestão anterior (json.loads + from_dict + to_datetime) com utils.ingestao.le_json.
+
+    python -m benchmarks.ingestao --linhas 100000 --repeticoes 3
+'''
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from benchmarks.gerador import gera_dados, gera_payload
+from utils.esquema import normaliza_tipos
+from utils.ingestao import le_json
+
+def ingestao_anterior(conteudo):
+    dados = pd.DataFrame.from_dict(json.loads(conteudo))
+    dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], 
+                                             format = '%d/%m/%Y')
+    return normaliza_tipos(dados)
+
+def cronometra(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type = int, default = 100_000)
+    parser.add_argument('--repeticoes', type = int, default = 3)
+    argumentos = parser.parse_args()
+
+    conteudo = gera_payload(gera_dados(argumentos.linhas, tipos_compactos = False))
+    tempo_anterior, anterior = cronometra(lambda: ingestao_anterior(conteudo), argumentos.repeticoes)
+    tempo_novo, novo = cronometra(lambda: le_json(conteudo), argumentos.repeticoes)
+    pd.testing.assert_frame_equal(anterior, novo)                                                  # os dois caminhos precisam gerar o mesmo DataFrame
+
+    print(f'{argumentos.linhas} linhas ({len(conteudo) / 2 ** 20:.1f} MB de json)')
+    print(f'anterior: {tempo_anterior:.3f}s')
+    print(f'le_json:  {tempo_novo:.3f}s ({tempo_anterior / tempo_novo:.1f}x)')
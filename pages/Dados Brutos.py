@@ -1,13 +1,15 @@
 import streamlit as st
-import pandas as pd
-import requests
 import time
 
+from utils.carregamento import motor_filtros
+from utils.exportacao import FORMATOS, exporta
+from utils.filtros import chave_filtros
+from utils.perfil import etapa, inicia_execucao, painel
+from utils.tabela import TAMANHOS_PAGINA, ordena, pagina, total_paginas
+
 st.set_page_config(layout = 'wide')                                                                # para alterar o formato da tela
 
-@st.cache_data                                                                                     # mantem o ultimo arquivo armazenado em cache
-def conversor_DF_CSV(df):
-    return df.to_csv(index = False).encode('utf-8')                                                # transforma em csv | codifica os dados em 'utf-8'
+inicia_execucao('Dados Brutos')                                                                    # tempos por etapa quando o perfil esta ativo (?perfil=1)
 
 def mensagem_sucesso():
     sucesso = st.success('Arquivo baixado com sucesso!',                                           # retorna uma mensagem de sucesso pra o usuario
@@ -18,11 +20,10 @@ def mensagem_sucesso():
 
 st.title('Dados Brutos')                                                                           # adiciona um titulo
 
-url = 'https://labdados.com/produtos'                                                              # site para pegar os dados / endereço da api
-response = requests.get(url)                                                                       # acesso aos dados da api
-dados = pd.DataFrame.from_dict(response.json())                                                    # transorma a requisição em Json para que ela possa ser transformada em DataFrame
-dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], 
-                                         format = '%d/%m/%Y')
+with etapa('carregamento') as medicao:
+    motor = motor_filtros()                                                                        # dados completos da api + indices para os filtros (compartilhados entre as sessões)
+    dados = motor.dados
+    medicao.linhas = len(dados)
 
 with st.expander('Colunas'):                                                                       # seção compacta-expandivel
     colunas = st.multiselect('Selecione as Colunas',                                               # caixa de seleção multipla
@@ -48,11 +49,11 @@ with st.sidebar.expander('Preço do Produto'):
     preco = st.slider('Selecione o Preço', 0, 5000, (0, 5000))                                     #  barra de seleção '(0,5000)' transforma o intervalo em continuo
 
 with st.sidebar.expander('Frete do Compra'):
-    frete = st.slider('Selecione o Valor do Frete', 
-                      dados['Frete'].min(), 
-                      dados['Frete'].max(), 
-                      (dados['Frete'].min(), 
-                       dados['Frete'].max()))
+    frete = st.slider('Selecione o Valor do Frete',                                                # .item() converte o float32/int8 do numpy em numero do python (exigido pelo slider)
+                      dados['Frete'].min().item(), 
+                      dados['Frete'].max().item(), 
+                      (dados['Frete'].min().item(), 
+                       dados['Frete'].max().item()))
 
 with st.sidebar.expander('Data da Compra'):
     data_compra = st.date_input('Selecione a Data',                                                # input de data na forma de calendario
@@ -73,10 +74,10 @@ with st.sidebar.expander('Local da Compra'):
 
 with st.sidebar.expander('Avaliação :star:'):
     avaliacao = st.slider('Selecione a Quantidade de Estrelas', 
-                          dados['Avaliação da compra'].min(), 
-                          dados['Avaliação da compra'].max(), 
-                          (dados['Avaliação da compra'].min(), 
-                           dados['Avaliação da compra'].max()))
+                          dados['Avaliação da compra'].min().item(), 
+                          dados['Avaliação da compra'].max().item(), 
+                          (dados['Avaliação da compra'].min().item(), 
+                           dados['Avaliação da compra'].max().item()))
 
 with st.sidebar.expander('Forma de Pagamento'):
     pagamento = st.multiselect('Selecione a Forma de Pagamento', 
@@ -86,59 +87,96 @@ with st.sidebar.expander('Forma de Pagamento'):
 
 with st.sidebar.expander('Nº de Parcelas'):
     parcelas = st.slider('Selecione a Quantidade de Parcelas', 
-                         dados['Quantidade de parcelas'].min(), 
-                         dados['Quantidade de parcelas'].max(), 
-                         (dados['Quantidade de parcelas'].min(), 
-                          dados['Quantidade de parcelas'].max()))
+                         dados['Quantidade de parcelas'].min().item(), 
+                         dados['Quantidade de parcelas'].max().item(), 
+                         (dados['Quantidade de parcelas'].min().item(), 
+                          dados['Quantidade de parcelas'].max().item()))
 
 with st.sidebar.expander('Latitude'):
     latitude = st.slider('Selecione a Latitude', 
-                         dados['lat'].min(), 
-                         dados['lat'].max(), 
-                         (dados['lat'].min(), 
-                          dados['lat'].max()))
+                         dados['lat'].min().item(), 
+                         dados['lat'].max().item(), 
+                         (dados['lat'].min().item(), 
+                          dados['lat'].max().item()))
 
 with st.sidebar.expander('Longitude'):
     longitude = st.slider('Selecione a Longitude', 
-                          dados['lon'].min(), 
-                          dados['lon'].max(), 
-                          (dados['lon'].min(), 
-                           dados['lon'].max()))
+                          dados['lon'].min().item(), 
+                          dados['lon'].max().item(), 
+                          (dados['lon'].min().item(), 
+                           dados['lon'].max().item()))
     
-query = '''
-Produto in @produtos and \
-`Categoria do Produto` in @categoria and \
-@preco[0] <= Preço <= @preco[1] and \
-@frete[0] <= Frete <= @frete[1] and \
-@data_compra[0] <= `Data da Compra` <= @data_compra[1] and \
-Vendedor in @vendedor and \
-`Local da compra` in @local and \
-@avaliacao[0] <= `Avaliação da compra` <= @avaliacao[1] and \
-`Tipo de pagamento` in @pagamento and \
-@parcelas[0] <= `Quantidade de parcelas` <= @parcelas[1] and \
-@latitude[0] <= lat <= @latitude[1] and \
-@longitude[0] <= lon <= @longitude[1]
-'''
-
-dados_filtrados = dados.query(query)
-dados_filtrados = dados_filtrados[colunas]
-
-st.dataframe(dados_filtrados)                                                                      # adiciona o dataframe ao dashboard
-
-st.markdown(f'''A tabela possui :blue[{dados_filtrados.shape[0]}] linhas 
-            e :blue[{dados_filtrados.shape[1]}] colunas''')                                        # exibe o texto em markdown
+filtros = {'Produto' : produtos, 
+           'Categoria do Produto' : categoria, 
+           'Preço' : preco, 
+           'Frete' : frete, 
+           'Data da Compra' : data_compra, 
+           'Vendedor' : vendedor, 
+           'Local da compra' : local, 
+           'Avaliação da compra' : avaliacao, 
+           'Tipo de pagamento' : pagamento, 
+           'Quantidade de parcelas' : parcelas, 
+           'lat' : latitude, 
+           'lon' : longitude}
+
+# filtros que ainda cobrem todos os valores são ignorados | só o filtro alterado é reavaliado
+with etapa('filtro', len(dados)):
+    linhas = motor.filtra(filtros, st.session_state.setdefault('filtros_dados_brutos', {}))
+indices_colunas = dados.columns.get_indexer(colunas)
+
+# na tabela paginada só as linhas da pagina visivel são enviadas ao navegador
+# a ordenação usa a ordem pre-calculada de cada coluna
+paginada = st.toggle('Tabela paginada', value = True)
+
+if paginada:
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        ordenar_por = st.selectbox('Ordenar por', [None] + colunas, 
+                                   format_func = lambda coluna: 'Sem ordenação' if coluna is None else coluna)
+    with col2:
+        crescente = st.radio('Ordem', ['Crescente', 'Decrescente'], horizontal = True) == 'Crescente'
+    with col3:
+        tamanho_pagina = st.selectbox('Linhas por pagina', TAMANHOS_PAGINA)
+    with col4:
+        numero_pagina = st.number_input('Pagina', 1, total_paginas(len(linhas), tamanho_pagina), 1)
+
+    with etapa('tabela', len(linhas)):
+        linhas_ordenadas = ordena(motor, linhas, ordenar_por, crescente, 
+                                  st.session_state.setdefault('ordem_dados_brutos', {}))
+        st.dataframe(dados.iloc[pagina(linhas_ordenadas, numero_pagina, tamanho_pagina), indices_colunas])
+else:
+    with etapa('tabela', len(linhas)):
+        st.dataframe(dados.iloc[linhas, indices_colunas])                                          # adiciona o dataframe ao dashboard
+
+st.markdown(f'''A tabela possui :blue[{len(linhas)}] linhas 
+            e :blue[{len(colunas)}] colunas''')                                                    # exibe o texto em markdown
 
 st.markdown('Escreva um nome para o arquivo')
 
-col1, col2 = st.columns(2)
+col1, col2, col3 = st.columns(3)
 
 with col1:
     nome_arquivo = st.text_input('', label_visibility = 'collapsed', value = 'dados')              # recebe uma string do usuario | label_visibility remove o espaço da visualização
-    nome_arquivo += '.csv'
 with col2:
-    st.download_button('Fazer o download da tabela em csv',                                        # botão de download para os dados
-                       data = conversor_DF_CSV(dados_filtrados),                                   # dados a serem baixados
-                       file_name = nome_arquivo,                                                   # nome do arquivo
-                       mime = 'text/csv',                                                          # formato do arquivo
-                       on_click = mensagem_sucesso)                                                # ação ao clicar                                                                               
-
+    formato = st.selectbox('Formato', list(FORMATOS), label_visibility = 'collapsed')              # csv, csv compactado (gzip) ou parquet
+    extensao, mime = FORMATOS[formato]
+    nome_arquivo += extensao
+with col3:
+    # o arquivo só é gerado quando pedido (botão Preparar), em blocos direto das linhas filtradas, e fica
+    # em um cache LRU (limitado em entradas e bytes) indexado pelo estado dos filtros
+    chave = (motor.versao, chave_filtros(filtros), tuple(colunas))
+    pedido = st.session_state.get('exportacao_dados_brutos') == (chave, formato)                   # um novo filtro ou formato exige um novo pedido
+    if not pedido:
+        st.button(f'Preparar o arquivo em {formato}',                                              # o pedido é registrado antes da reexecução (callback)
+                  on_click = st.session_state.__setitem__, 
+                  args = ('exportacao_dados_brutos', (chave, formato)))
+    else:
+        with etapa('exportacao', len(linhas)):
+            arquivo = exporta(dados, linhas, indices_colunas, formato, chave)
+        st.download_button(f'Fazer o download da tabela em {formato}',                             # botão de download para os dados
+                           data = arquivo,                                                         # dados a serem baixados
+                           file_name = nome_arquivo,                                               # nome do arquivo
+                           mime = mime,                                                            # formato do arquivo
+                           on_click = mensagem_sucesso)                                            # ação ao clicar
+
+painel()                                                                                           # painel de perfil na barra lateral (só com o perfil ativo)
@@ -0,0 +1,10 @@
+import os
+import socket
+
+# a api é substituida por um servidor local (tests/servidor.py) | LABDADOS_URL precisa estar definida antes
+# de utils.api ser importado
+with socket.socket() as _socket:
+    _socket.bind(('127.0.0.1', 0))
+    PORTA_API = _socket.getsockname()[1]
+
+os.environ['LABDADOS_URL'] = f'http://127.0.0.1:{PORTA_API}/produtos'
@@ -0,0 +1,55 @@
+'''Servidor local no lugar da api, com ETag, falhas e atraso configuraveis por consulta.'''
+import hashlib
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class ApiLocal(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, porta, payload):
+        super().__init__(('127.0.0.1', porta), _Resposta)
+        self.payload = payload                                                                     # bytes (a mesma resposta sempre) ou função (regiao, ano) -> bytes
+        self.atraso = {}                                                                           # regiao -> segundos antes de responder
+        self.falhas = Counter()                                                                    # regiao -> respostas 503 antes da primeira 200
+        self.requisicoes = Counter()                                                               # (regiao, status) -> quantidade
+        self._trava = threading.Lock()
+
+    def corpo(self, regiao, ano):
+        return self.payload(regiao, ano) if callable(self.payload) else self.payload
+
+    def registra(self, regiao, status):
+        with self._trava:
+            self.requisicoes[regiao, status] += 1
+
+class _Resposta(BaseHTTPRequestHandler):
+    def do_GET(self):
+        consulta = parse_qs(urlparse(self.path).query)
+        regiao = consulta.get('regiao', [''])[0]
+        ano = consulta.get('ano', [''])[0]
+        time.sleep(self.server.atraso.get(regiao, 0))
+        if self.server.falhas[regiao] > 0:
+            self.server.falhas[regiao] -= 1
+            self._responde(regiao, 503)
+            return
+        corpo = self.server.corpo(regiao, ano)
+        etag = '"' + hashlib.sha1(corpo).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._responde(regiao, 304, etag = etag)
+        else:
+            self._responde(regiao, 200, corpo, etag)
+
+    def _responde(self, regiao, status, corpo = b'', etag = None):
+        self.server.registra(regiao, status)
+        self.send_response(status)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *argumentos):
+        pass
@@ -0,0 +1,56 @@
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+from benchmarks.gerador import gera_dados
+from utils import agregacao
+from utils.agregacao import agrega_vendas, constroi_cubo
+from utils.esquema import normaliza_tipos
+
+@pytest.fixture(scope = 'module')
+def brutos():
+    return gera_dados(300_000, semente = 3, tipos_compactos = False)                               # floats em float64, como chegam da api
+
+def test_totais_do_cubo_iguais_ao_groupby_em_float64(brutos):
+    agregados = agrega_vendas(constroi_cubo(normaliza_tipos(brutos), processos = 1))
+
+    for chave, coluna in [('categorias', 'Categoria do Produto'), ('vendedores', 'Vendedor')]:
+        esperado = brutos.groupby(coluna, observed = True)['Preço'].sum()
+        pd.testing.assert_series_equal(agregados[chave]['Preço'], esperado, check_exact = False, rtol = 1e-12)
+    estados = brutos.groupby('Local da compra', observed = True)['Preço'].sum()
+    pd.testing.assert_series_equal(agregados['estados'].set_index('Local da compra')['Preço'], estados, 
+                                   check_exact = False, rtol = 1e-12)
+    mensal = brutos.groupby(pd.Grouper(key = 'Data da Compra', freq = 'ME'))['Preço'].sum()
+    pd.testing.assert_series_equal(agregados['mensal'].set_index('Data da Compra')['Preço'], mensal, 
+                                   check_exact = False, rtol = 1e-12, check_freq = False)
+    assert round(agregados['receita_total'], 2) == round(brutos['Preço'].sum(), 2)
+    assert agregados['quantidade_vendas'] == len(brutos)
+
+@pytest.fixture
+def sem_pools():
+    yield
+    for processos in list(agregacao.pools):
+        agregacao._descarta_pool(processos)
+
+def test_cubo_paralelo_igual_ao_de_um_processo(sem_pools):
+    dados = gera_dados(200_000, semente = 5)
+    pd.testing.assert_frame_equal(constroi_cubo(dados, processos = 2), constroi_cubo(dados, processos = 1))
+
+def test_cubo_sem_paralelismo_quando_o_main_e_trocado(sem_pools, monkeypatch):
+    # simula outra sessão do streamlit reexecutando o script (e trocando o __main__) durante a criação dos processos
+    outro = types.ModuleType('__main__')
+    submit = agregacao.ProcessPoolExecutor.submit
+    def submit_com_reexecucao(pool, *args):
+        sys.modules['__main__'] = outro
+        return submit(pool, *args)
+    monkeypatch.setattr(agregacao.ProcessPoolExecutor, 'submit', submit_com_reexecucao)
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])                          # devolve o __main__ original no fim do teste
+
+    dados = gera_dados(20_000, semente = 5)
+    cubo = constroi_cubo(dados, processos = 3)
+
+    assert sys.modules['__main__'] is outro                                                        # o __main__ da outra execução não é sobrescrito
+    assert 3 not in agregacao.pools
+    pd.testing.assert_frame_equal(cubo, constroi_cubo(dados, processos = 1))
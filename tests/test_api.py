@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from benchmarks.gerador import gera_dados, gera_payload
+from tests.conftest import PORTA_API
+from tests.servidor import ApiLocal
+from utils import api
+
+@pytest.fixture(scope = 'module')
+def servidor():
+    servidor = ApiLocal(PORTA_API, gera_payload(gera_dados(500, tipos_compactos = False)))
+    threading.Thread(target = servidor.serve_forever, daemon = True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+@pytest.fixture(autouse = True)
+def sem_respostas_guardadas():
+    api.respostas.clear()
+
+def test_revalidacao_reaproveita_os_dados_no_304(servidor):
+    primeira = api.busca_dados('norte')
+    segunda = api.busca_dados('norte')
+
+    assert servidor.requisicoes['norte', 200] == 1
+    assert servidor.requisicoes['norte', 304] == 1
+    pd.testing.assert_frame_equal(primeira, segunda)
+    assert len(primeira) == 500
+
+def test_repete_a_requisicao_em_erro_5xx(servidor):
+    servidor.falhas['sul'] = 2
+
+    dados = api.busca_dados('sul')
+
+    assert servidor.requisicoes['sul', 503] == 2
+    assert servidor.requisicoes['sul', 200] == 1
+    assert len(dados) == 500
+
+def test_chamadas_simultaneas_fazem_uma_requisicao(servidor):
+    servidor.atraso['nordeste'] = 0.5
+
+    with ThreadPoolExecutor(max_workers = 20) as executor:
+        resultados = list(executor.map(lambda _: api.busca_dados('nordeste', 2021), range(20)))
+
+    assert servidor.requisicoes['nordeste', 200] == 1
+    assert all(len(dados) == 500 for dados in resultados)
+
+def test_respostas_guardadas_sao_limitadas(servidor, monkeypatch):
+    monkeypatch.setattr(api, 'RESPOSTAS_MAX', 2)
+
+    for regiao in ('centro-oeste', 'sudeste', 'suldeste'):
+        api.busca_dados(regiao)
+
+    assert [chave[1] for chave in api.respostas] == ['sudeste', 'suldeste']
@@ -0,0 +1,54 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmarks.gerador import gera_dados, gera_payload
+from tests.conftest import PORTA_API
+from tests.servidor import ApiLocal
+from utils import api, carregamento
+
+# divisão dos estados feita pela api | utils.carregamento precisa filtrar as mesmas linhas que ela
+REGIOES_API = {'norte' : ['AC', 'AP', 'AM', 'PA', 'RO', 'RR', 'TO'],
+               'nordeste' : ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
+               'centro-oeste' : ['DF', 'GO', 'MT', 'MS'],
+               'sudeste' : ['ES', 'MG', 'RJ', 'SP'],
+               'sul' : ['PR', 'RS', 'SC']}
+
+def filtra_na_api(brutos):
+    def payload(regiao, ano):
+        filtrados = brutos
+        if regiao:
+            filtrados = filtrados[filtrados['Local da compra'].isin(REGIOES_API.get(regiao, []))]
+        if ano:
+            filtrados = filtrados[filtrados['Data da Compra'].dt.year == int(ano)]
+        return gera_payload(filtrados)
+    return payload
+
+@pytest.fixture(scope = 'module')
+def servidor():
+    servidor = ApiLocal(PORTA_API, filtra_na_api(gera_dados(2_000, semente = 11, tipos_compactos = False)))
+    threading.Thread(target = servidor.serve_forever, daemon = True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+@pytest.fixture(autouse = True)
+def sem_cache(monkeypatch):
+    monkeypatch.setattr(carregamento, 'USA_SNAPSHOT', False)                                       # dados completos direto do servidor local
+    api.respostas.clear()
+    for funcao in (carregamento.dados_indexados, carregamento.carrega_dados):
+        funcao.clear()
+
+# regiões como enviadas pelo Dashboard ('suldeste' é a grafia exibida por ele)
+@pytest.mark.parametrize('regiao', carregamento.PRE_CARREGAMENTO_REGIOES)
+@pytest.mark.parametrize('ano', ['', 2020, 2023])
+def test_filtro_local_igual_ao_da_api(servidor, monkeypatch, regiao, ano):
+    monkeypatch.setattr(carregamento, 'FILTRO_LOCAL', True)
+    local = carregamento.carrega_dados(regiao, ano)                                                # filtra_regiao_ano sobre os dados completos
+    carregamento.carrega_dados.clear()
+    monkeypatch.setattr(carregamento, 'FILTRO_LOCAL', False)                                       # DASHBOARD_FILTRO_LOCAL=0
+    remoto = carregamento.carrega_dados(regiao, ano)                                               # resposta filtrada pelo servidor
+
+    assert len(local) > 0
+    pd.testing.assert_frame_equal(local, remoto)
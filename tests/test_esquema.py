@@ -0,0 +1,13 @@
+import numpy as np
+import pandas as pd
+
+from utils.esquema import normaliza_tipos
+
+def test_float32_apenas_para_valores_em_centavos():
+    dados = pd.DataFrame({'Preço' : [133.94, 10.0, np.nan, 99999.99], 
+                          'Frete' : [208.57397384199163, 1.5, 2.0, 3.0]})
+    convertidos = normaliza_tipos(dados)
+    assert convertidos['Preço'].dtype == 'float32'
+    assert convertidos['Frete'].dtype == 'float64'
+    assert convertidos['Frete'][0] == 208.57397384199163
+    np.testing.assert_array_equal(convertidos['Preço'].astype('float64').round(2), dados['Preço'])
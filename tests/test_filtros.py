@@ -0,0 +1,46 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.executa import filtro_anterior
+from benchmarks.gerador import gera_dados
+from utils.filtros import MotorFiltros
+
+LISTAS = ['Produto', 'Categoria do Produto', 'Vendedor', 'Local da compra', 'Tipo de pagamento']
+INTERVALOS = ['Frete', 'Avaliação da compra', 'Quantidade de parcelas', 'lat', 'lon']
+
+@pytest.fixture(scope = 'module')
+def dados():
+    return gera_dados(5_000, semente = 7)
+
+def filtros_aleatorios(dados, aleatorio):
+    # metade das vezes cada filtro cobre todos os valores (como a pagina aberta), na outra metade restringe
+    filtros = {}
+    for coluna in LISTAS:
+        valores = list(dados[coluna].unique())
+        if aleatorio.random() < 0.5:
+            valores = list(aleatorio.choice(valores, aleatorio.integers(0, len(valores) + 1), replace = False))
+        filtros[coluna] = valores
+    for coluna in INTERVALOS:
+        minimo, maximo = dados[coluna].min().item(), dados[coluna].max().item()
+        if aleatorio.random() < 0.5:
+            minimo, maximo = sorted(aleatorio.uniform(minimo, maximo, 2))
+            if dados[coluna].dtype.kind == 'i':
+                minimo, maximo = int(minimo), int(maximo)
+        filtros[coluna] = (minimo, maximo)
+    filtros['Preço'] = (0, 5000) if aleatorio.random() < 0.5 else (100, 2000)
+    inicio = datetime.date(2020, 1, 1) + datetime.timedelta(days = int(aleatorio.integers(0, 1400)))
+    filtros['Data da Compra'] = (datetime.date(2019, 1, 1), datetime.date(2024, 1, 1)) if aleatorio.random() < 0.5 else \
+                                (inicio, inicio + datetime.timedelta(days = int(aleatorio.integers(0, 400))))
+    return filtros
+
+def test_motor_equivale_ao_query(dados):
+    motor = MotorFiltros(dados)
+    estado = {}                                                                                    # compartilhado entre as rodadas, como na sessão da pagina
+    aleatorio = np.random.default_rng(3)
+    for _ in range(300):
+        filtros = filtros_aleatorios(dados, aleatorio)
+        pd.testing.assert_frame_equal(dados.iloc[motor.filtra(filtros, estado)], 
+                                      filtro_anterior(dados, filtros))
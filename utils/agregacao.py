@@ -0,0 +1,152 @@
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from utils.esquema import em_float64
+
+logger = logging.getLogger(__name__)
+
+# soma da receita e contagem de vendas em uma unica passada do groupby
+AGREGACAO = {'Preço' : ('Preço', 'sum'), 
+             'Vendas' : ('Preço', 'size')}
+
+# no cubo as vendas ja estão contadas | a agregação passa a somar as contagens
+AGREGACAO_CUBO = {'Preço' : ('Preço', 'sum'), 
+                  'Vendas' : ('Vendas', 'sum')}
+
+# granularidade do cubo: vendedor x estado x categoria x mês
+DIMENSOES_CUBO = ['Vendedor', 
+                  'Local da compra', 
+                  'Categoria do Produto', 
+                  pd.Grouper(key = 'Data da Compra', freq = 'ME')]
+
+# acima desse numero de linhas o cubo é montado em paralelo, em um pool de processos
+# DASHBOARD_PARALELO_PROCESSOS=1 desativa | o padrão é limitado a 8 porque os processos ficam vivos com o app
+PARALELO_MIN_LINHAS = int(os.environ.get('DASHBOARD_PARALELO_LINHAS', 1_000_000))
+PARALELO_PROCESSOS = int(os.environ.get('DASHBOARD_PARALELO_PROCESSOS', min(os.cpu_count() or 1, 8)))
+
+COLUNAS_CUBO = ['Vendedor', 'Local da compra', 'Categoria do Produto', 'Data da Compra', 'lat', 'lon', 'Preço']
+
+# pools persistentes (um por quantidade de processos) | spawn porque o streamlit executa varias threads
+pools = {}
+trava_pools = threading.Lock()
+
+def _aguarda_processos(barreira):
+    # inicialização de cada processo do pool: só termina quando todos os processos ja existem
+    barreira.wait(timeout = 60)
+
+def _cria_pool(processos):
+    contexto = multiprocessing.get_context('spawn')
+    pool = ProcessPoolExecutor(max_workers = processos, 
+                               mp_context = contexto, 
+                               initializer = _aguarda_processos, 
+                               initargs = (contexto.Barrier(processos),))
+
+    # sob o streamlit o __main__ é o script da pagina, e o spawn o executaria inteiro em cada processo novo
+    # os processos são criados todos aqui, uma unica vez, com um __main__ vazio no lugar
+    # (a barreira segura os processos ja criados, então cada submissão cria um processo novo)
+    vazio = types.ModuleType('__main__')
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = vazio
+    try:
+        tarefas = [pool.submit(int) for _ in range(processos)]
+    finally:
+        trocado = sys.modules['__main__'] is not vazio                                             # a reexecução de outra sessão instalou o script dela
+        if not trocado:
+            sys.modules['__main__'] = main
+    if trocado:                                                                                    # algum processo pode ter recebido o script: descarta o pool
+        pool.shutdown(wait = True, cancel_futures = True)                                          # espera: os processos ainda carregam a barreira
+        raise BrokenProcessPool('__main__ substituido durante a criação dos processos')
+    for tarefa in tarefas:
+        tarefa.result()
+    return pool
+
+def _pool(processos):
+    with trava_pools:
+        if processos not in pools:
+            pools[processos] = _cria_pool(processos)
+        return pools[processos]
+
+def _descarta_pool(processos):
+    with trava_pools:
+        pool = pools.pop(processos, None)
+    if pool is not None:
+        pool.shutdown(wait = False, cancel_futures = True)
+
+def _cubo(dados):
+    # executado tanto no processo do app quanto nos processos do pool (precisa ser uma função de modulo)
+    # a soma é feita em float64: somar o float32 guardado perde centavos nos totais (o float32 é só para armazenar)
+    dados = dados[COLUNAS_CUBO].assign(**{'Preço' : em_float64(dados['Preço'], 'Preço')})
+    cubo = dados.groupby(DIMENSOES_CUBO, observed = True).agg(lat = ('lat', 'first'), 
+                                                              lon = ('lon', 'first'), 
+                                                              **AGREGACAO)
+    return cubo.reset_index()
+
+def _particoes(dados, processos):
+    '''Posições das linhas de cada partição | todas as vendas de uma celula do cubo caem na mesma partição.'''
+    chave = np.zeros(len(dados), dtype = 'int64')
+    for coluna in DIMENSOES_CUBO[:-1]:
+        serie = dados[coluna]
+        codigos = serie.cat.codes.to_numpy() if isinstance(serie.dtype, pd.CategoricalDtype) else pd.factorize(serie)[0]
+        chave = chave * (int(codigos.max(initial = 0)) + 2) + codigos + 1                          # +1: valores ausentes (-1) também formam um grupo
+    chave = (chave % processos).astype('int16')                                                    # o mês não entra: as celulas de um vendedor x estado x categoria ficam juntas
+    ordem = np.argsort(chave, kind = 'stable')                                                     # estavel: dentro da partição as linhas mantem a ordem original
+    limites = np.searchsorted(chave[ordem], np.arange(1, processos))
+    return [posicoes for posicoes in np.split(ordem, limites) if len(posicoes)]
+
+def _cubo_paralelo(dados, processos):
+    # cada celula do cubo é somada inteira em um unico processo, na mesma ordem das linhas, então as somas
+    # parciais são identicas às do groupby em um processo só | a junção é apenas concatenar e ordenar
+    dados = dados[COLUNAS_CUBO]
+    particoes = [dados.iloc[posicoes] for posicoes in _particoes(dados, processos)]
+    parciais = list(_pool(processos).map(_cubo, particoes))
+    cubo = pd.concat(parciais, ignore_index = True)
+    return cubo.sort_values(COLUNAS_CUBO[:4], kind = 'stable', ignore_index = True)                # mesma ordem das chaves do groupby
+
+def constroi_cubo(dados, processos = None):
+    '''Cubo de vendas | processos=None escolhe o modo paralelo automaticamente pelo numero de linhas.'''
+    if processos is None:
+        processos = PARALELO_PROCESSOS if len(dados) >= PARALELO_MIN_LINHAS else 1
+    if processos <= 1:
+        return _cubo(dados)
+    try:
+        return _cubo_paralelo(dados, processos)
+    except BrokenProcessPool:                                                                      # processo do pool encerrado (ex.: falta de memoria): refaz em um processo só
+        logger.warning('pool de processos interrompido, montando o cubo sem paralelismo', exc_info = True)
+        _descarta_pool(processos)
+        return _cubo(dados)
+
+def agrega_vendas(dados):
+    # aceita tanto as vendas linha a linha quanto o cubo (que ja tem a coluna Vendas)
+    agregacao = AGREGACAO_CUBO if 'Vendas' in dados else AGREGACAO
+    dados = dados.assign(**{'Preço' : em_float64(dados['Preço'], 'Preço')})                        # no cubo o Preço ja esta em float64
+
+    # estados: a posição (lat, lon) é a da primeira compra de cada estado, como no drop_duplicates anterior
+    estados = dados.groupby('Local da compra', observed = True).agg(lat = ('lat', 'first'), 
+                                                                     lon = ('lon', 'first'), 
+                                                                     **agregacao)
+    estados = estados.reset_index()
+
+    # mensal: o Grouper inclui os meses sem vendas (receita e vendas iguais a zero)
+    mensal = dados.groupby(pd.Grouper(key = 'Data da Compra', freq = 'ME')).agg(**agregacao)
+    mensal = mensal.reset_index()
+    mensal['Ano'] = mensal['Data da Compra'].dt.year
+    mensal['Mes'] = mensal['Data da Compra'].dt.month_name()
+
+    categorias = dados.groupby('Categoria do Produto', observed = True).agg(**agregacao)
+    vendedores = dados.groupby('Vendedor', observed = True).agg(**agregacao)
+
+    return {'estados' : estados, 
+            'mensal' : mensal, 
+            'categorias' : categorias, 
+            'vendedores' : vendedores, 
+            'receita_total' : dados['Preço'].sum(), 
+            'quantidade_vendas' : dados['Vendas'].sum() if 'Vendas' in dados else len(dados)}
@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.ingestao import le_json
+from utils.perfil import etapa
+
+url = os.environ.get('LABDADOS_URL', 'https://labdados.com/produtos')                              # site para pegar os dados / endereço da api (pode apontar para um servidor local)
+
+TIMEOUT = (float(os.environ.get('LABDADOS_TIMEOUT_CONEXAO', 3.05)),                               # segundos para conectar e para receber a resposta
+           float(os.environ.get('LABDADOS_TIMEOUT_LEITURA', 30)))
+TENTATIVAS = int(os.environ.get('LABDADOS_TENTATIVAS', 3))
+CONEXOES = int(os.environ.get('LABDADOS_CONEXOES', 10))                                            # conexões mantidas abertas no pool
+RESPOSTAS_MAX = int(os.environ.get('LABDADOS_RESPOSTAS', 4))                                       # respostas guardadas para revalidação (cada uma é um DataFrame inteiro)
+
+def cria_sessao():
+    # repete a requisição em falhas de conexão e erros temporarios do servidor (espera 0.5s, 1s, 2s ...)
+    tentativas = Retry(total = TENTATIVAS, 
+                       backoff_factor = 0.5, 
+                       status_forcelist = (429, 500, 502, 503, 504), 
+                       allowed_methods = ('GET',))
+    adaptador = HTTPAdapter(max_retries = tentativas, 
+                            pool_connections = CONEXOES, 
+                            pool_maxsize = CONEXOES)
+    sessao = requests.Session()
+    sessao.mount('https://', adaptador)
+    sessao.mount('http://', adaptador)
+    sessao.headers['Accept-Encoding'] = 'gzip, deflate'
+    return sessao
+
+# sessão unica do processo: reaproveita as conexões (sem novo handshake tcp/tls a cada requisição)
+sessao = cria_sessao()
+
+# requisições em andamento: chamadas simultaneas para a mesma consulta esperam a mesma resposta
+# (chave) -> Future
+em_andamento = {}
+trava = threading.Lock()
+
+# ultima resposta das consultas mais recentes, usada para revalidar com ETag / Last-Modified
+# (chave) -> (etag, last_modified, dados) | LRU limitado a RESPOSTAS_MAX (com o filtro local só a consulta sem filtros é usada)
+respostas = OrderedDict()
+
+def busca_dados(regiao = '', ano = ''):
+    chave = (url, regiao, str(ano))
+    with trava:
+        futuro = em_andamento.get(chave)
+        lider = futuro is None                                                                     # só a primeira chamada faz a requisição
+        if lider:
+            futuro = em_andamento[chave] = Future()
+    if lider:
+        try:
+            futuro.set_result(_requisita(regiao, ano, chave))
+        except BaseException as erro:                                                              # as chamadas que estavam esperando recebem o mesmo erro
+            futuro.set_exception(erro)
+        finally:
+            with trava:
+                del em_andamento[chave]
+    return futuro.result().copy(deep = False)                                                      # a copia guardada não é alterada por quem chamou
+
+def _requisita(regiao, ano, chave):
+    query_string = {'regiao' : regiao, 'ano' : ano}                                                # vai substituir parte da url pela entrada do usuario
+    with trava:
+        anterior = respostas.get(chave)
+        if anterior is not None:
+            respostas.move_to_end(chave)                                                           # passa a ser a mais recente
+
+    cabecalhos = {}
+    if anterior is not None:
+        etag, last_modified, _ = anterior
+        if etag:
+            cabecalhos['If-None-Match'] = etag
+        if last_modified:
+            cabecalhos['If-Modified-Since'] = last_modified
+
+    with etapa('api.requisicao'):
+        response = sessao.get(url,
+                              params = query_string, 
+                              headers = cabecalhos, 
+                              timeout = TIMEOUT)                                                   # acesso aos dados da api
+    if response.status_code == 304 and anterior is not None:                                       # dados não mudaram: usa a copia local
+        return anterior[2]
+    response.raise_for_status()
+
+    dados = le_json(response.content)                                                              # json -> colunas tipadas (categorias, numeros menores e datas)
+
+    etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+    if etag or last_modified:
+        with trava:
+            respostas[chave] = (etag, last_modified, dados)
+            respostas.move_to_end(chave)
+            while len(respostas) > RESPOSTAS_MAX:                                                  # descarta as consultas usadas ha mais tempo
+                respostas.popitem(last = False)
+    return dados
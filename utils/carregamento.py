@@ -0,0 +1,162 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import snapshot
+from utils.agregacao import constroi_cubo
+from utils.api import busca_dados
+from utils.filtros import MotorFiltros
+from utils.perfil import etapa
+
+logger = logging.getLogger(__name__)
+
+# tempo de vida (segundos) e limite de entradas do cache | podem ser alterados por variavel de ambiente
+CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60 * 60))
+CACHE_MAX_ENTRADAS = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRADAS', 32))
+
+# com o filtro local a api é consultada uma unica vez (sem filtros) e regiao/ano são filtrados em memoria
+# com DASHBOARD_FILTRO_LOCAL=0 volta a fazer uma requisição por combinação de filtros
+FILTRO_LOCAL = os.environ.get('DASHBOARD_FILTRO_LOCAL', '1') == '1'
+
+# com o snapshot local o app inicia e funciona sem a api | DASHBOARD_SNAPSHOT_ATIVO=0 desativa
+USA_SNAPSHOT = os.environ.get('DASHBOARD_SNAPSHOT_ATIVO', '1') == '1'
+
+# estados de cada região (mesma divisão usada pela api)
+REGIOES_ESTADOS = {'norte' : ['AC', 'AP', 'AM', 'PA', 'RO', 'RR', 'TO'],
+                   'nordeste' : ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
+                   'centro-oeste' : ['DF', 'GO', 'MT', 'MS'],
+                   'sudeste' : ['ES', 'MG', 'RJ', 'SP'],
+                   'sul' : ['PR', 'RS', 'SC']}
+
+ESTADOS_REGIAO = {estado : regiao for regiao, estados in REGIOES_ESTADOS.items() for estado in estados}
+
+# combinações de região (como enviadas pelo Dashboard) e ano carregadas antes do primeiro acesso
+# DASHBOARD_PRE_CARREGAMENTO=0 desativa
+PRE_CARREGAMENTO = os.environ.get('DASHBOARD_PRE_CARREGAMENTO', '1') == '1'
+PRE_CARREGAMENTO_REGIOES = ['', 'norte', 'nordeste', 'centro-oeste', 'suldeste', 'sul']
+PRE_CARREGAMENTO_ANOS = ['', 2020, 2021, 2022, 2023]
+PRE_CARREGAMENTO_THREADS = int(os.environ.get('DASHBOARD_PRE_CARREGAMENTO_THREADS', 4))
+
+# grafias alternativas aceitas no parametro regiao ('Suldeste' é o nome exibido no Dashboard)
+REGIOES_ALIAS = {'suldeste' : 'sudeste'}
+
+# uma unica thread de atualização do snapshot por processo
+@st.cache_resource
+def inicia_atualizacao_snapshot():
+    return snapshot.inicia_atualizacao(ao_atualizar = recarrega)
+
+def dados_completos():
+    if not USA_SNAPSHOT:
+        return busca_dados()
+    dados = snapshot.le_snapshot()
+    if dados is None:                                                                              # primeira execução: cria o snapshot a partir da api
+        dados = snapshot.atualiza_snapshot()
+    inicia_atualizacao_snapshot()
+    return dados
+
+# dados completos + colunas auxiliares pre-calculadas (codigo da região e ano de cada linha)
+# cache_resource não copia o objeto a cada chamada | ele é apenas lido, nunca alterado
+@st.cache_resource(ttl = CACHE_TTL, 
+                   show_spinner = 'Carregando os dados...')
+def dados_indexados():
+    dados = dados_completos()
+    regioes = pd.Categorical(dados['Local da compra'].map(ESTADOS_REGIAO), 
+                             categories = list(REGIOES_ESTADOS))
+    anos = dados['Data da Compra'].dt.year.to_numpy()
+    return dados, regioes.codes, anos
+
+def mascara_regiao_ano(regioes, anos, regiao = '', ano = ''):
+    mascara = np.ones(len(anos), dtype = bool)
+    if regiao:
+        codigo = list(REGIOES_ESTADOS).index(regiao) if regiao in REGIOES_ESTADOS else -2          # região desconhecida não retorna linhas
+        mascara &= regioes == codigo
+    if ano:
+        mascara &= anos == int(ano)
+    return mascara
+
+def filtra_regiao_ano(dados, regioes, anos, regiao = '', ano = ''):
+    filtrados = dados[mascara_regiao_ano(regioes, anos, regiao, ano)].reset_index(drop = True)     # mesmo indice da resposta filtrada pela api
+    categoricas = filtrados.select_dtypes('category').columns
+    return filtrados.assign(**{coluna : filtrados[coluna].cat.remove_unused_categories()             # e as mesmas categorias que ela teria
+                               for coluna in categoricas})
+
+# o cache do streamlit é compartilhado por todas as sessões e paginas do processo
+# a chave é formada pelos argumentos (regiao, ano) | entradas expiram apos CACHE_TTL e as
+# mais antigas são descartadas quando passam de CACHE_MAX_ENTRADAS
+@st.cache_data(ttl = CACHE_TTL, 
+               max_entries = CACHE_MAX_ENTRADAS, 
+               show_spinner = 'Carregando os dados...')
+def carrega_dados(regiao = '', ano = ''):
+    regiao = REGIOES_ALIAS.get(regiao, regiao)                                                     # a mesma grafia no filtro local e na consulta à api
+    if FILTRO_LOCAL:
+        return filtra_regiao_ano(*dados_indexados(), regiao, ano)
+    return busca_dados(regiao, ano)
+
+# cubo (vendedor x estado x categoria x mês) montado uma vez por versão dos dados
+@st.cache_data(ttl = CACHE_TTL, 
+               show_spinner = 'Montando o cubo de vendas...')
+def cubo_completo():
+    dados = dados_indexados()[0]
+    with etapa('agregacao.cubo', len(dados)):
+        return constroi_cubo(dados)
+
+# região e ano são filtros sobre as linhas do cubo (estado e mês), sem voltar aos dados brutos
+@st.cache_data(ttl = CACHE_TTL, 
+               max_entries = CACHE_MAX_ENTRADAS, 
+               show_spinner = False)
+def carrega_cubo(regiao = '', ano = ''):
+    regiao = REGIOES_ALIAS.get(regiao, regiao)
+    if not FILTRO_LOCAL:
+        return constroi_cubo(carrega_dados(regiao, ano))
+    cubo = cubo_completo()
+    regioes = pd.Categorical(cubo['Local da compra'].map(ESTADOS_REGIAO), 
+                             categories = list(REGIOES_ESTADOS))
+    mascara = mascara_regiao_ano(regioes.codes, cubo['Data da Compra'].dt.year.to_numpy(), regiao, ano)
+    return cubo[mascara].reset_index(drop = True)
+
+# indices do Dados Brutos montados uma vez por versão dos dados e compartilhados pelas sessões
+@st.cache_resource(ttl = CACHE_TTL, 
+                   show_spinner = 'Indexando os dados...')
+def motor_filtros():
+    dados = carrega_dados()
+    with etapa('filtro.indices', len(dados)):
+        return MotorFiltros(dados)
+
+def recarrega():
+    # snapshot atualizado: descarta os dados em cache para as proximas execuções lerem o arquivo novo
+    for funcao in (dados_indexados, carrega_dados, cubo_completo, carrega_cubo, motor_filtros):
+        funcao.clear()
+    if PRE_CARREGAMENTO:
+        pre_carrega()
+
+def pre_carrega():
+    with ThreadPoolExecutor(max_workers = PRE_CARREGAMENTO_THREADS, 
+                            thread_name_prefix = 'pre-carregamento') as executor:
+        list(executor.map(lambda combinacao: carrega_cubo(*combinacao), 
+                          itertools.product(PRE_CARREGAMENTO_REGIOES, PRE_CARREGAMENTO_ANOS)))
+
+def _laco_pre_carregamento():
+    while True:
+        try:
+            pre_carrega()
+        except Exception:
+            logger.exception('falha no pre-carregamento')
+        time.sleep(CACHE_TTL)                                                                      # recarrega quando as entradas do cache expiram
+
+# uma unica thread de pre-carregamento por processo
+@st.cache_resource
+def inicia_pre_carregamento():
+    if not PRE_CARREGAMENTO:
+        return None
+    thread = threading.Thread(target = _laco_pre_carregamento, 
+                              name = 'pre-carregamento', 
+                              daemon = True)
+    thread.start()
+    return thread
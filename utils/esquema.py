@@ -0,0 +1,62 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.perfil import etapa
+
+logger = logging.getLogger(__name__)
+
+# tipo compacto de cada coluna do payload da api
+# nos floats, casas_decimais indica que o float32 só é aceito quando os valores têm no máximo essas casas (ex.: centavos)
+# e voltam exatos do float32 com um arredondamento (None aceita sempre | frete com mais casas continua em float64)
+ESQUEMA = {'Produto' :                ('category', None),
+           'Categoria do Produto' :   ('category', None),
+           'Vendedor' :               ('category', None),
+           'Local da compra' :        ('category', None),
+           'Tipo de pagamento' :      ('category', None),
+           'Preço' :                  ('float32', 2),
+           'Frete' :                  ('float32', 2),
+           'Avaliação da compra' :    ('integer', None),
+           'Quantidade de parcelas' : ('integer', None),
+           'lat' :                    ('float32', None),
+           'lon' :                    ('float32', None)}
+
+def _converte(serie, tipo, casas_decimais):
+    if tipo == 'category':
+        return serie.astype('category')
+    if tipo == 'integer':
+        if serie.isna().any():                                                                     # inteiros do numpy não aceitam valores nulos
+            return serie
+        return pd.to_numeric(serie, downcast = 'integer')                                          # menor inteiro que comporta os valores (int8 para avaliação e parcelas)
+    convertido = serie.astype(tipo)
+    if casas_decimais is not None:
+        originais = serie.to_numpy(dtype = 'float64')
+        exatos = np.round(originais, casas_decimais) == originais
+        recuperados = np.round(convertido.to_numpy(dtype = 'float64'), casas_decimais) == originais
+        if not (np.isnan(originais) | (exatos & recuperados)).all():
+            return serie
+    return convertido
+
+def em_float64(serie, coluna, esquema = ESQUEMA):
+    '''Valores da coluna em float64 | colunas guardadas em float32 voltam aos valores exatos (ex.: 133.94, não 133.94000244).'''
+    if serie.dtype != 'float32':
+        return serie
+    valores = serie.astype('float64')
+    casas_decimais = esquema.get(coluna, (None, None))[1]
+    return valores if casas_decimais is None else valores.round(casas_decimais)
+
+def normaliza_tipos(dados, esquema = ESQUEMA):
+    with etapa('esquema.tipos', len(dados)) as medicao:
+        # medir a memoria das colunas de texto é caro: só mede com o perfil ativo (painel "Perfil da execução") ou com o log
+        relatorio = medicao.ativa or logger.isEnabledFor(logging.INFO)
+        antes = dados.memory_usage(deep = True).sum() if relatorio else 0
+        dados = dados.assign(**{coluna : _converte(dados[coluna], tipo, casas_decimais) 
+                                for coluna, (tipo, casas_decimais) in esquema.items() 
+                                if coluna in dados})
+        if not relatorio:
+            return dados
+        depois = dados.memory_usage(deep = True).sum()
+        medicao.detalhe = f'{antes / 2 ** 20:.1f} MB -> {depois / 2 ** 20:.1f} MB ({(antes - depois) / 2 ** 20:.1f} MB economizados)'
+        logger.info('tipos normalizados: %s', medicao.detalhe)
+    return dados
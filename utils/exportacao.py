@@ -0,0 +1,96 @@
+import gzip
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+TAMANHO_BLOCO = int(os.environ.get('DASHBOARD_EXPORTACAO_BLOCO', 50_000))                          # linhas convertidas por vez
+
+# limites do cache de arquivos exportados (compartilhado por todas as sessões do processo)
+CACHE_EXPORTACAO_ENTRADAS = int(os.environ.get('DASHBOARD_EXPORTACAO_ENTRADAS', 16))
+CACHE_EXPORTACAO_BYTES = int(os.environ.get('DASHBOARD_EXPORTACAO_BYTES', 256 * 2 ** 20))
+
+# formato: (extensão do arquivo, mime)
+FORMATOS = {'csv' : ('.csv', 'text/csv'), 
+            'csv (gzip)' : ('.csv.gz', 'application/gzip'), 
+            'parquet' : ('.parquet', 'application/vnd.apache.parquet')}
+
+class CacheLRU:
+    '''Cache LRU limitado pela quantidade de entradas e pelo total de bytes guardados.'''
+
+    def __init__(self, max_entradas, max_bytes):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obtem(self, chave, gera, tamanho = len):
+        with self._trava:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)                                                  # passa a ser a mais recente
+                return self._entradas[chave][0]
+        conteudo = gera()                                                                          # gerado fora da trava para não bloquear as outras sessões
+        bytes_conteudo = tamanho(conteudo)
+        with self._trava:
+            if bytes_conteudo <= self.max_bytes and chave not in self._entradas:
+                self._entradas[chave] = (conteudo, bytes_conteudo)
+                self.bytes += bytes_conteudo
+                while len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes:      # descarta as menos usadas
+                    _, (_, descartados) = self._entradas.popitem(last = False)
+                    self.bytes -= descartados
+        return conteudo
+
+cache_exportacao = CacheLRU(CACHE_EXPORTACAO_ENTRADAS, CACHE_EXPORTACAO_BYTES)
+
+def _blocos(dados, tamanho_bloco, linhas = None, colunas = None):
+    # linhas e colunas são posições em dados | cada bloco é montado direto da tabela completa,
+    # sem materializar a tabela filtrada inteira
+    linhas = np.arange(len(dados)) if linhas is None else linhas
+    colunas = slice(None) if colunas is None else colunas
+    for inicio in range(0, max(len(linhas), 1), tamanho_bloco):                                    # tabela vazia ainda gera o cabeçalho
+        yield inicio, dados.iloc[linhas[inicio:inicio + tamanho_bloco], colunas]
+
+def escreve_csv(dados, destino, tamanho_bloco = TAMANHO_BLOCO, linhas = None, colunas = None):
+    # só um bloco de texto existe em memoria por vez
+    for inicio, bloco in _blocos(dados, tamanho_bloco, linhas, colunas):
+        destino.write(bloco.to_csv(index = False, header = inicio == 0).encode('utf-8'))
+
+def escreve_parquet(dados, destino, tamanho_bloco = TAMANHO_BLOCO, linhas = None, colunas = None):
+    escritor = None
+    for _, bloco in _blocos(dados, tamanho_bloco, linhas, colunas):
+        tabela = pa.Table.from_pandas(bloco, preserve_index = False)
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, tabela.schema)
+        escritor.write_table(tabela)                                                               # cada bloco vira um row group
+    escritor.close()
+
+def converte(dados, formato, tamanho_bloco = TAMANHO_BLOCO, linhas = None, colunas = None):
+    '''Arquivo no formato escolhido, em um BytesIO | devolvido sem copiar o conteudo para um bytes.'''
+    destino = io.BytesIO()
+    if formato == 'csv':
+        escreve_csv(dados, destino, tamanho_bloco, linhas, colunas)
+    elif formato == 'csv (gzip)':
+        with gzip.GzipFile(fileobj = destino, mode = 'wb', mtime = 0) as compactado:
+            escreve_csv(dados, compactado, tamanho_bloco, linhas, colunas)
+    elif formato == 'parquet':
+        escreve_parquet(dados, destino, tamanho_bloco, linhas, colunas)
+    else:
+        raise ValueError(f'formato de exportação desconhecido: {formato}')
+    destino.seek(0)
+    return destino
+
+def exporta(dados, linhas, colunas, formato, chave):
+    '''
+    Arquivo exportado (BytesIO), guardado no cache LRU.
+
+    linhas, colunas: posições em dados | a tabela filtrada é montada bloco a bloco, só quando o arquivo não esta no cache
+    chave: estado dos filtros que gerou as linhas (e não o DataFrame, que seria caro de hashear)
+    '''
+    return cache_exportacao.obtem((chave, formato), 
+                                  lambda: converte(dados, formato, linhas = linhas, colunas = colunas), 
+                                  tamanho = lambda arquivo: arquivo.getbuffer().nbytes)
@@ -0,0 +1,107 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+def chave_filtros(filtros):
+    # representação imutavel (e comparavel) do estado dos filtros
+    return tuple((coluna, tuple(valor)) for coluna, valor in filtros.items())
+
+class MotorFiltros:
+    '''
+    Filtros do Dados Brutos sobre indices pre-calculados de cada coluna.
+
+    - colunas numericas e de data: valores ordenados + posição original de cada valor (filtro por intervalo)
+    - colunas de texto/categoria: linhas agrupadas pelo codigo da categoria (filtro por lista de valores)
+
+    Cada filtro vira um bitmap (np.packbits) e o resultado é a interseção dos bitmaps. Filtros que
+    ainda cobrem todo o dominio da coluna são ignorados, e o ultimo bitmap de cada coluna fica
+    guardado no estado da sessão, então mudar um filtro só reavalia aquele filtro.
+    '''
+
+    def __init__(self, dados):
+        self.dados = dados
+        self.linhas = len(dados)
+        self.versao = uuid.uuid4().hex                                                             # invalida o estado das sessões quando os dados mudam
+        self._intervalos = {}
+        self._categorias = {}
+        for coluna in dados.columns:
+            serie = dados[coluna]
+            if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+                valores = serie.to_numpy()
+                ordem = np.argsort(valores, kind = 'stable')
+                self._intervalos[coluna] = (valores[ordem], ordem)
+            else:
+                categorias = serie.cat if isinstance(serie.dtype, pd.CategoricalDtype) else pd.Categorical(serie)
+                codigos = np.asarray(categorias.codes)
+                ordem = np.argsort(codigos, kind = 'stable')
+                limites = np.concatenate([[0], np.cumsum(np.bincount(codigos + 1,                  # codigo -1 (nulo) fica na primeira faixa
+                                                                     minlength = len(categorias.categories) + 1))])
+                self._categorias[coluna] = (categorias.categories, ordem, limites)
+
+    def ordem(self, coluna):
+        # posições das linhas em ordem crescente da coluna (as categorias ja estão em ordem alfabetica)
+        if coluna in self._intervalos:
+            return self._intervalos[coluna][1]
+        return self._categorias[coluna][1]
+
+    def _bitmap(self, linhas):
+        mascara = np.zeros(self.linhas, dtype = bool)
+        mascara[linhas] = True
+        return np.packbits(mascara)
+
+    def _intervalo(self, coluna, inicio, fim):
+        valores, ordem = self._intervalos[coluna]
+        if np.issubdtype(valores.dtype, np.datetime64):
+            inicio, fim = [None if limite is None else pd.Timestamp(limite).to_datetime64() for limite in (inicio, fim)]
+        primeiro = 0 if inicio is None else np.searchsorted(valores, inicio, side = 'left')
+        ultimo = self.linhas if fim is None else np.searchsorted(valores, fim, side = 'right')
+        if primeiro == 0 and ultimo == self.linhas:                                                # cobre todo o dominio
+            return None
+        return self._bitmap(ordem[primeiro:ultimo])
+
+    def _lista(self, coluna, selecionados):
+        categorias, ordem, limites = self._categorias[coluna]
+        codigos = np.unique(categorias.get_indexer(list(selecionados)))
+        codigos = codigos[codigos >= 0]
+        presentes = np.flatnonzero(np.diff(limites)[1:])                                           # codigos que aparecem em alguma linha
+        if limites[1] == 0 and np.isin(presentes, codigos).all():                                  # sem nulos e com todos os valores selecionados
+            return None
+        return self._bitmap(np.concatenate([ordem[limites[codigo + 1]:limites[codigo + 2]] for codigo in codigos] or [[]]).astype(np.intp))
+
+    def _avalia(self, coluna, valor):
+        if coluna in self._intervalos:
+            valor = tuple(valor)
+            return self._intervalo(coluna, valor[0], valor[1] if len(valor) > 1 else None)         # o date_input devolve uma data só enquanto o intervalo é escolhido
+        return self._lista(coluna, valor)
+
+    def filtra(self, filtros, estado):
+        '''
+        Retorna as posições das linhas que atendem a todos os filtros.
+
+        filtros: {coluna: (inicio, fim)} para colunas numericas/data e {coluna: valores} para as demais
+        estado: dicionario da sessão (st.session_state) onde ficam os bitmaps do ultimo filtro de cada coluna
+        '''
+        if estado.get('versao') != self.versao:
+            estado.clear()
+            estado.update(versao = self.versao, bitmaps = {}, resultado = None)
+
+        chave = chave_filtros(filtros)
+        if estado['resultado'] is not None and estado['resultado'][0] == chave:
+            return estado['resultado'][1]
+
+        bitmaps = []
+        for coluna, valor in chave:
+            anterior = estado['bitmaps'].get(coluna)
+            if anterior is None or anterior[0] != valor:                                           # só reavalia os filtros que mudaram
+                anterior = (valor, self._avalia(coluna, valor))
+                estado['bitmaps'][coluna] = anterior
+            if anterior[1] is not None:
+                bitmaps.append(anterior[1])
+
+        if bitmaps:
+            linhas = np.flatnonzero(np.unpackbits(np.bitwise_and.reduce(bitmaps), count = self.linhas))
+        else:
+            linhas = np.arange(self.linhas)
+        estado['resultado'] = (chave, linhas)
+        return linhas
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+# figuras guardadas por combinação de dados agregados + parametros do grafico
+CACHE_FIGURAS_ENTRADAS = int(os.environ.get('DASHBOARD_CACHE_FIGURAS', 256))
+
+CASAS_DECIMAIS = 2
+
+def enxuga(fig):
+    '''
+    Reduz o JSON enviado ao navegador.
+
+    - arredonda os valores dos traços para CASAS_DECIMAIS (somas de float geram muitas casas decimais)
+    - mantem do template o layout e só os padrões dos tipos de traço usados na figura (os dos demais
+      tipos ocupam a maior parte do JSON e não afetam o grafico)
+    '''
+    for traco in fig.data:
+        for atributo in ('x', 'y', 'lat', 'lon'):
+            valores = getattr(traco, atributo, None)
+            if valores is not None and np.asarray(valores).dtype.kind == 'f':
+                traco[atributo] = np.round(np.asarray(valores, dtype = 'float64'), CASAS_DECIMAIS)
+    template = fig.layout.template
+    tipos = {traco.type for traco in fig.data}
+    fig.update_layout(template = go.layout.Template(layout = template.layout, 
+                                                    data = {tipo : template.data[tipo] for tipo in tipos}))
+    return fig
+
+@st.cache_data(max_entries = CACHE_FIGURAS_ENTRADAS, show_spinner = False)
+def mapa_estados(dados_estados, valor, titulo):
+    # scatter_geo : grafico de dispersão em cima de um mapa
+    fig = px.scatter_geo(dados_estados, 
+                         lat = 'lat', 
+                         lon = 'lon',
+                         scope = 'south america',                                                  # filtra a região de exibição do mapa
+                         size = valor,                                                             # tamanho da bolha
+                         template = 'seaborn',                                                     # estilo da imagem
+                         hover_name = 'Local da compra',                                           # nomeia o hover
+                         hover_data = {'lat' : False, 'lon' : False},                              # remove informações do hover
+                         title = titulo)
+    return enxuga(fig)
+
+@st.cache_data(max_entries = CACHE_FIGURAS_ENTRADAS, show_spinner = False)
+def linha_mensal(dados_mensal, valor, titulo, titulo_eixo):
+    fig = px.line(dados_mensal, 
+                  x = 'Mes',
+                  y = valor,
+                  markers = True,
+                  range_y = (0, dados_mensal[valor].max()),                                        # limites do eixo y
+                  color = 'Ano',                                                                   # cor da linha pela variavel ano
+                  line_dash = 'Ano',                                                               # formato da linha pela variavel ano
+                  title = titulo)
+    fig.update_layout(yaxis_title = titulo_eixo)
+    fig.update_xaxes(tickangle=315)
+    return enxuga(fig)
+
+@st.cache_data(max_entries = CACHE_FIGURAS_ENTRADAS, show_spinner = False)
+def barras_estados(dados_estados, valor, titulo, titulo_eixo):
+    fig = px.bar(dados_estados[:5],
+                 x = 'Local da compra',
+                 y = valor,
+                 text_auto = True,                                                                 # coloca o valor correspondente em cima de cada coluna
+                 title = titulo)
+    fig.update_layout(yaxis_title = titulo_eixo)
+    return enxuga(fig)
+
+@st.cache_data(max_entries = CACHE_FIGURAS_ENTRADAS, show_spinner = False)
+def barras_horizontais(dados, valor, titulo, titulo_eixo = None):
+    fig = px.bar(dados,
+                 x = valor,
+                 y = dados.index,
+                 text_auto = True,
+                 title = titulo)
+    if titulo_eixo:
+        fig.update_layout(xaxis_title = titulo_eixo)
+    return enxuga(fig)
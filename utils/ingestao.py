@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.esquema import ESQUEMA, normaliza_tipos
+from utils.perfil import etapa
+
+try:                                                                                               # orjson é opcional: decodifica o json bem mais rapido que o modulo padrão
+    import orjson
+    decodifica_json = orjson.loads
+except ImportError:
+    decodifica_json = json.loads
+
+FORMATO_DATA = '%d/%m/%Y'
+
+def converte_datas(valores):
+    '''
+    Converte datas dd/mm/aaaa em datetime64[ns] de uma vez, fazendo contas sobre os bytes do texto.
+
+    Qualquer valor fora desse formato exato (nulo, sem zero a esquerda, data inexistente) faz a conversão
+    cair no pd.to_datetime, que mantem o comportamento e as mensagens de erro do caminho anterior.
+    '''
+    try:
+        brutos = np.array(valores, dtype = 'S11')                                                  # 10 caracteres + 1 para detectar textos maiores
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return pd.to_datetime(pd.Series(valores), format = FORMATO_DATA).to_numpy()
+    caracteres = brutos.view(np.uint8).reshape(len(brutos), 11).astype(np.int32)
+    digitos = caracteres[:, [0, 1, 3, 4, 6, 7, 8, 9]] - ord('0')
+    dia = digitos[:, 0] * 10 + digitos[:, 1]
+    mes = digitos[:, 2] * 10 + digitos[:, 3]
+    ano = digitos[:, 4] * 1000 + digitos[:, 5] * 100 + digitos[:, 6] * 10 + digitos[:, 7]
+
+    meses = (ano - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (mes - 1)
+    datas = meses.astype('datetime64[D]') + (dia - 1)
+
+    valido = ((digitos >= 0) & (digitos <= 9)).all(axis = 1)
+    valido &= (caracteres[:, 2] == ord('/')) & (caracteres[:, 5] == ord('/')) & (caracteres[:, 10] == 0)
+    valido &= (mes >= 1) & (mes <= 12) & (dia >= 1) & (datas.astype('datetime64[M]') == meses)     # dia existe no mês
+    if not valido.all():
+        return pd.to_datetime(pd.Series(valores), format = FORMATO_DATA).to_numpy()
+    return datas.astype('datetime64[ns]')
+
+def _colunas(registros):
+    # lista de registros -> uma lista por coluna (None quando os registros não tem todos as mesmas chaves)
+    nomes = list(registros[0])
+    if any(len(registro) != len(nomes) for registro in registros):
+        return None
+    try:
+        return {nome : [registro[nome] for registro in registros] for nome in nomes}
+    except (KeyError, TypeError):
+        return None
+
+def _array(nome, valores):
+    # lista de valores -> array ja no tipo do esquema (sem a inferencia de tipos do pandas)
+    tipo = ESQUEMA.get(nome, (None, None))[0]
+    try:
+        if tipo == 'category':
+            return pd.Categorical(np.array(valores, dtype = object))
+        if tipo == 'float32':
+            return np.array(valores, dtype = 'float64')                                            # normaliza_tipos decide se cabe em float32
+        if tipo == 'integer':
+            inteiros = np.array(valores)
+            if inteiros.dtype.kind in 'iu':
+                return inteiros
+    except (TypeError, ValueError):
+        pass
+    return valores                                                                                 # demais colunas (ou valores inesperados): o pandas infere o tipo
+
+def le_json(conteudo):
+    '''Payload json da api -> DataFrame com os tipos compactos do esquema.'''
+    with etapa('ingestao.json') as medicao:
+        registros = decodifica_json(conteudo)
+        medicao.linhas = len(registros)
+    colunas = _colunas(registros) if isinstance(registros, list) and registros else None
+    if colunas is None:                                                                            # outros formatos aceitos pelo from_dict
+        with etapa('ingestao.colunas'):
+            dados = pd.DataFrame.from_dict(registros)
+        if 'Data da Compra' in dados:
+            with etapa('ingestao.datas', len(dados)):
+                dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format = FORMATO_DATA)
+    else:
+        if 'Data da Compra' in colunas:
+            with etapa('ingestao.datas', len(registros)):
+                colunas['Data da Compra'] = converte_datas(colunas['Data da Compra'])
+        with etapa('ingestao.colunas', len(registros)):
+            dados = pd.DataFrame({nome : valores if nome == 'Data da Compra' else _array(nome, valores) 
+                                  for nome, valores in colunas.items()})
+    return normaliza_tipos(dados)                                                                  # medida na etapa esquema.tipos
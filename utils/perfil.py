@@ -0,0 +1,180 @@
+'''
+Instrumentação opcional das etapas de cada reexecução (tempo, linhas processadas e variação de memoria).
+
+Ativação:
+- DASHBOARD_PERFIL=1 ativa para todas as sessões (tempo, linhas e memoria)
+- ?perfil=1 na url ativa só para a sessão atual (tempo e linhas, sem memoria)
+
+Cada etapa medida vai para o painel "Perfil da execução" na barra lateral, para o log (uma linha json por
+etapa no stderr, logger dashboard.perfil) e para os totais do processo, expostos em formato Prometheus em
+http://127.0.0.1:<DASHBOARD_PERFIL_PORTA>/metrics quando a porta é definida.
+
+A memoria é medida com tracemalloc, que deixa o processo inteiro mais lento enquanto esta ligado. Por isso
+só o operador liga a medição de memoria (DASHBOARD_PERFIL=1), nunca um parametro da url. Como o tracemalloc
+é global, sessões executando ao mesmo tempo aparecem nas variações umas das outras.
+'''
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger('dashboard.perfil')
+
+PERFIL_ATIVO = os.environ.get('DASHBOARD_PERFIL', '0') == '1'
+PORTA_METRICAS = int(os.environ.get('DASHBOARD_PERFIL_PORTA', 0))                                 # 0 não abre o endpoint
+
+class Medicao:
+    '''Resultado de uma etapa | linhas e detalhe podem ser preenchidos dentro do bloco medido.'''
+
+    def __init__(self, etapa, linhas = None):
+        self.etapa = etapa
+        self.linhas = linhas
+        self.segundos = 0.0
+        self.memoria = None
+        self.nivel = 0                                                                             # etapas dentro de outras etapas (ex.: ingestao.* dentro de carregamento)
+        self.detalhe = None                                                                        # texto livre exibido no painel e no log
+        self.ativa = False                                                                         # False com o perfil desligado (a medição é descartada)
+
+class Totais:
+    '''Totais por etapa acumulados no processo (todas as sessões).'''
+
+    def __init__(self):
+        self._etapas = {}
+        self._trava = threading.Lock()
+
+    def acumula(self, medicao):
+        with self._trava:
+            total = self._etapas.setdefault(medicao.etapa, {'execucoes' : 0, 'segundos' : 0.0, 'linhas' : 0})
+            total['execucoes'] += 1
+            total['segundos'] += medicao.segundos
+            total['linhas'] += medicao.linhas or 0
+
+    def prometheus(self):
+        with self._trava:
+            etapas = {etapa : dict(total) for etapa, total in self._etapas.items()}
+        linhas = []
+        for nome, campo, descricao in (('dashboard_etapa_execucoes_total', 'execucoes', 'Execuções da etapa'), 
+                                       ('dashboard_etapa_segundos_total', 'segundos', 'Tempo total da etapa'), 
+                                       ('dashboard_etapa_linhas_total', 'linhas', 'Linhas processadas pela etapa')):
+            linhas += [f'# HELP {nome} {descricao}', f'# TYPE {nome} counter']
+            linhas += [f'{nome}{{etapa="{etapa}"}} {total[campo]}' for etapa, total in sorted(etapas.items())]
+        return '\n'.join(linhas) + '\n'
+
+totais = Totais()
+
+# profundidade das etapas abertas em cada thread
+_aninhamento = threading.local()
+
+def _configura_log():
+    # o streamlit só configura os loggers streamlit.* | sem um handler as linhas json seriam descartadas
+    if logger.handlers:
+        return
+    saida = logging.StreamHandler()
+    saida.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(saida)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+if PERFIL_ATIVO:
+    _configura_log()
+
+def _sessao():
+    # estado da sessão atual | None fora da thread do script (ex.: pre-carregamento em segundo plano)
+    return st.session_state if get_script_run_ctx(suppress_warning = True) is not None else None
+
+def ativo():
+    if PERFIL_ATIVO:
+        return True
+    sessao = _sessao()
+    return sessao is not None and sessao.get('perfil_ativo', False)
+
+def inicia_execucao(pagina):
+    '''Chamado no inicio de cada pagina: limpa as medições da reexecução anterior.'''
+    st.session_state['perfil_ativo'] = PERFIL_ATIVO or st.query_params.get('perfil') == '1'
+    st.session_state['perfil_pagina'] = pagina
+    st.session_state['perfil_etapas'] = []
+    if not st.session_state['perfil_ativo']:
+        return
+    _configura_log()
+    if PORTA_METRICAS:
+        inicia_servidor_metricas(PORTA_METRICAS)
+
+@contextmanager
+def etapa(nome, linhas = None):
+    medicao = Medicao(nome, linhas)
+    if not ativo():
+        yield medicao
+        return
+    medicao.ativa = True
+    medicao.nivel = getattr(_aninhamento, 'nivel', 0)
+    if PERFIL_ATIVO and not tracemalloc.is_tracing():                                              # memoria só com o perfil ligado pelo operador
+        tracemalloc.start()
+    memoria_inicial = tracemalloc.get_traced_memory()[0] if PERFIL_ATIVO else None
+    _aninhamento.nivel = medicao.nivel + 1
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    finally:
+        medicao.segundos = time.perf_counter() - inicio
+        _aninhamento.nivel = medicao.nivel
+        if memoria_inicial is not None:
+            medicao.memoria = tracemalloc.get_traced_memory()[0] - memoria_inicial
+        _registra(medicao)
+
+def _registra(medicao):
+    totais.acumula(medicao)
+    sessao = _sessao()
+    pagina = sessao.get('perfil_pagina') if sessao is not None else None
+    logger.info(json.dumps({'pagina' : pagina, 'etapa' : medicao.etapa, 'nivel' : medicao.nivel, 
+                            'segundos' : round(medicao.segundos, 6), 'linhas' : medicao.linhas, 
+                            'memoria_bytes' : medicao.memoria, 'detalhe' : medicao.detalhe}, ensure_ascii = False))
+    if sessao is not None and 'perfil_etapas' in sessao:
+        sessao['perfil_etapas'].append(medicao)
+
+def painel():
+    '''Tabela com as etapas da reexecução atual na barra lateral (só quando o perfil esta ativo).'''
+    if not st.session_state.get('perfil_ativo'):
+        return
+    medicoes = st.session_state.get('perfil_etapas', [])
+    # etapas internas aparecem recuadas e ficam fora do total (ja estão no tempo das externas)
+    tabela = pd.DataFrame({'Etapa' : ['· ' * medicao.nivel + medicao.etapa for medicao in medicoes], 
+                           'Tempo (ms)' : [medicao.segundos * 1000 for medicao in medicoes], 
+                           'Linhas' : [medicao.linhas for medicao in medicoes], 
+                           'Memoria (MB)' : [None if medicao.memoria is None else medicao.memoria / 2 ** 20 for medicao in medicoes], 
+                           'Detalhe' : [medicao.detalhe for medicao in medicoes]})
+    total = sum(medicao.segundos for medicao in medicoes if medicao.nivel == 0) * 1000
+    with st.sidebar.expander('Perfil da execução', expanded = True):
+        st.dataframe(tabela, hide_index = True, 
+                     column_config = {'Tempo (ms)' : st.column_config.NumberColumn(format = '%.1f'), 
+                                      'Memoria (MB)' : st.column_config.NumberColumn(format = '%.2f')})
+        st.caption(f'Total medido: {total:.1f} ms' + ('' if PERFIL_ATIVO else ' | memoria só com DASHBOARD_PERFIL=1'))
+
+class _RespostaMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        corpo = totais.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *argumentos):                                                            # sem log a cada coleta
+        pass
+
+# um unico servidor de metricas por processo, apenas na interface local
+@st.cache_resource
+def inicia_servidor_metricas(porta):
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), _RespostaMetricas)
+    threading.Thread(target = servidor.serve_forever, name = 'metricas-perfil', daemon = True).start()
+    return servidor
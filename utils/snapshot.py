@@ -0,0 +1,90 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+from pyarrow import feather
+
+from utils.api import busca_dados
+from utils.esquema import normaliza_tipos
+from utils.perfil import etapa
+
+logger = logging.getLogger(__name__)
+
+# copia local dos dados em arrow ipc (feather v2) sem compressão, para poder ser lida com memory map
+SNAPSHOT_CAMINHO = os.environ.get('DASHBOARD_SNAPSHOT', 
+                                  os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+                                               'dados', 'produtos.arrow'))
+SNAPSHOT_INTERVALO = int(os.environ.get('DASHBOARD_SNAPSHOT_INTERVALO', 60 * 60))                  # segundos entre as atualizações em segundo plano
+
+def le_snapshot(caminho = SNAPSHOT_CAMINHO):
+    if not os.path.exists(caminho):
+        return None
+    with etapa('snapshot.leitura') as medicao:
+        tabela = feather.read_table(caminho, memory_map = True)                                    # mapeia o arquivo em memoria em vez de ler tudo para um buffer
+        medicao.linhas = tabela.num_rows
+        return normaliza_tipos(tabela.to_pandas())                                                 # snapshots antigos podem ter sido gravados sem os tipos compactos
+
+def grava_snapshot(dados, caminho = SNAPSHOT_CAMINHO):
+    pasta = os.path.dirname(caminho) or '.'
+    os.makedirs(pasta, exist_ok = True)
+    # grava em um arquivo temporario na mesma pasta e troca de uma vez (os leitores nunca veem um arquivo pela metade)
+    descritor, temporario = tempfile.mkstemp(dir = pasta, suffix = '.tmp')
+    os.close(descritor)
+    try:
+        feather.write_feather(dados, temporario, compression = 'uncompressed')
+        os.chmod(temporario, 0o644)                                                                # mkstemp cria com 0600 | o app pode rodar com outro usuario que o cron
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+def atualiza_snapshot(caminho = SNAPSHOT_CAMINHO):
+    novos = busca_dados()
+    atual = le_snapshot(caminho)
+    if atual is None or atual.empty:
+        dados = novos
+    else:
+        # mantem o historico gravado e acrescenta apenas as compras a partir da ultima data conhecida
+        # o ultimo dia pode estar incompleto, então as linhas dele são substituidas pelas da api
+        ultima_data = atual['Data da Compra'].max()
+        dados = pd.concat([atual[atual['Data da Compra'] < ultima_data], 
+                           novos[novos['Data da Compra'] >= ultima_data]], 
+                          ignore_index = True)
+        dados = normaliza_tipos(dados)                                                             # o concat perde o tipo category quando as categorias diferem
+    grava_snapshot(dados, caminho)
+    logger.info('snapshot atualizado: %d linhas em %s', len(dados), caminho)
+    return dados
+
+def idade_snapshot(caminho = SNAPSHOT_CAMINHO):
+    try:
+        return time.time() - os.path.getmtime(caminho)
+    except OSError:                                                                                # ainda não existe
+        return float('inf')
+
+def _laco_atualizacao(caminho, intervalo, ao_atualizar):
+    while True:
+        time.sleep(max(0, intervalo - idade_snapshot(caminho)))                                    # snapshot vencido (ex.: app reiniciado) é atualizado na hora
+        try:
+            atualiza_snapshot(caminho)
+        except Exception:
+            logger.exception('falha ao atualizar o snapshot %s', caminho)                          # mantem o snapshot anterior e tenta de novo no proximo ciclo
+            time.sleep(intervalo)
+            continue
+        if ao_atualizar is not None:
+            ao_atualizar()
+
+def inicia_atualizacao(caminho = SNAPSHOT_CAMINHO, intervalo = SNAPSHOT_INTERVALO, ao_atualizar = None):
+    '''Thread que atualiza o snapshot quando ele passa de intervalo segundos | ao_atualizar é chamada depois de cada atualização.'''
+    thread = threading.Thread(target = _laco_atualizacao, 
+                              args = (caminho, intervalo, ao_atualizar), 
+                              name = 'atualizacao-snapshot', 
+                              daemon = True)
+    thread.start()
+    return thread
+
+if __name__ == '__main__':                                                                         # python -m utils.snapshot (ex.: agendado no cron)
+    logging.basicConfig(level = logging.INFO)
+    atualiza_snapshot()
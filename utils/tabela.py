@@ -0,0 +1,32 @@
+import math
+
+import numpy as np
+
+TAMANHOS_PAGINA = [50, 100, 500, 1000]
+
+def ordena(motor, linhas, coluna, crescente, estado):
+    '''
+    Posições das linhas filtradas na ordem da coluna escolhida.
+
+    Usa a ordem pre-calculada pelo MotorFiltros (sem ordenar de novo) e guarda o resultado no
+    estado da sessão, então trocar de pagina não refaz o trabalho.
+    '''
+    if coluna is None:
+        return linhas
+    chave = (motor.versao, coluna, crescente)
+    if estado.get('chave') != chave or estado.get('base') is not linhas:                          # o motor devolve o mesmo array enquanto os filtros não mudam
+        ordem = motor.ordem(coluna)
+        selecionadas = np.zeros(motor.linhas, dtype = bool)
+        selecionadas[linhas] = True
+        ordenadas = ordem[selecionadas[ordem]]
+        estado['chave'] = chave
+        estado['base'] = linhas
+        estado['linhas'] = ordenadas if crescente else ordenadas[::-1]
+    return estado['linhas']
+
+def total_paginas(quantidade, tamanho):
+    return max(math.ceil(quantidade / tamanho), 1)
+
+def pagina(linhas, numero, tamanho):
+    inicio = (numero - 1) * tamanho
+    return linhas[inicio:inicio + tamanho]